@@ -1,10 +1,57 @@
 """app.py — Flask application entry point. Registers blueprints."""
 
+import os
+import gzip
 import secrets
-from flask import Flask
+from flask import Flask, request
+
+from helpers import OrjsonProvider, load_muscle_groups, load_handle_types, load_settings
+
+SECRET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".secret")
+
+
+def _load_secret_key():
+    """Read the persisted session secret, creating it on first run.
+
+    Keeping the key across restarts means existing session cookies stay valid.
+    """
+    try:
+        with open(SECRET_FILE, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        key = secrets.token_bytes(32)
+        fd = os.open(SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(32)
+app.json = OrjsonProvider(app)
+app.secret_key = _load_secret_key()
+app.config["COMPRESS_MIN_SIZE"] = 512  # bytes; smaller bodies aren't worth gzipping
+app.config["COMPRESS_LEVEL"] = 6
+
+
+@app.after_request
+def _gzip_json(response):
+    """Gzip JSON responses for clients that accept it."""
+    if (
+        response.status_code != 200
+        or response.mimetype != "application/json"
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    data = response.get_data()
+    if len(data) < app.config["COMPRESS_MIN_SIZE"]:
+        return response
+    response.vary.add("Accept-Encoding")
+    if "gzip" in request.accept_encodings:
+        response.set_data(gzip.compress(data, compresslevel=app.config["COMPRESS_LEVEL"]))
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
 
 # Register blueprints
 from routes.auth import auth_bp
@@ -15,5 +62,10 @@ app.register_blueprint(auth_bp)
 app.register_blueprint(workouts_bp)
 app.register_blueprint(settings_bp)
 
+# Warm the mapping caches so the first request doesn't pay for the disk read
+load_muscle_groups()
+load_handle_types()
+load_settings()
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
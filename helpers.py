@@ -3,11 +3,20 @@
 import os
 import time
 import json
+import atexit
+import sqlite3
+import functools
 import threading
+from contextlib import closing
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import session, jsonify
+from flask.json.provider import JSONProvider
 
 BASE_URL = "https://euapi.speediance.com"
 HOST = "euapi.speediance.com"
@@ -15,7 +24,9 @@ DEVICE_TYPE = 1  # Gym Monster
 
 _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(_BASE_DIR, "config.json")
-HISTORY_CACHE_FILE = os.path.join(_BASE_DIR, "exercise_history.json")
+HISTORY_DB_FILE = os.path.join(_BASE_DIR, "exercise_history.db")
+MAPPINGS_FILE = os.path.join(_BASE_DIR, "mappings.json")
+# Legacy per-section files, only read to migrate into MAPPINGS_FILE
 MUSCLE_GROUPS_FILE = os.path.join(_BASE_DIR, "muscle_groups.json")
 HANDLE_TYPES_FILE = os.path.join(_BASE_DIR, "handle_types.json")
 SETTINGS_FILE = os.path.join(_BASE_DIR, "settings.json")
@@ -29,69 +40,376 @@ MOBILE_DEVICES = json.dumps({
     "manufacturer": "Google",
 })
 
-# In-memory cache for exercise history
-exercise_history_cache = {"data": None, "timestamp": 0, "user_id": None}
-cache_lock = threading.Lock()
-CACHE_TTL = 300  # 5 minutes
-CACHE_VERSION = 2  # Bump to invalidate persistent cache when schema changes
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and request.get_json)."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Same argument handling as jsonify(): one positional value as-is,
+        # several as a list, keyword arguments as a dict
+        if args and kwargs:
+            raise TypeError("jsonify() takes either args or kwargs, not both")
+        if len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs or None
+        # Hand orjson's bytes straight to the response; dumps() would decode them to
+        # str only for Werkzeug to encode them back to UTF-8
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), mimetype="application/json"
+        )
+
+
+# Shared HTTP session: keep-alive connection pool reused across requests and threads.
+# Every call goes to one host, so pool_maxsize is what matters: it covers all of
+# EXECUTOR's workers plus request threads calling directly, so no connection is
+# dropped as "pool full" and re-handshaken on the next call.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=48,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# One persistent worker pool for all upstream fan-out (calendar months, training and
+# template details, debug probes). Tasks on it must never wait on other EXECUTOR futures.
+EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="wk")
+atexit.register(EXECUTOR.shutdown, wait=False, cancel_futures=True)
+
+# In-memory snapshot of the last exercise history response:
+# (payload, user_id, fingerprint). Always replaced as a whole by rebinding, so
+# readers never need a lock. It has no TTL: it is invalidated when the calendar
+# shows a workout it wasn't built from or lacks one it was, and on login, logout
+# and session expiry.
+_history_snapshot = (None, None, None)
+CACHE_VERSION = 3  # Bump to invalidate persistent cache when schema changes
+
+# Set once the history database schema has been created/validated
+_history_db_ready = False
+_history_db_lock = threading.Lock()
+
+# Parsed JSON files, keyed by path: {path: (mtime_ns, parsed_obj)}
+_json_cache = {}
+_json_cache_lock = threading.Lock()
+# Bumped whenever a cached file's content changes; exposed as an HTTP ETag
+_json_generation = {}
+_ETAG_EPOCH = f"{time.time_ns():x}"  # distinguishes generations across restarts
+
+# Write-back buffering: paths whose cached object is newer than the file on disk
+WRITE_BACK_DELAY = 2.0  # seconds of quiet before a pending write is flushed
+WRITE_BACK_MAX_PENDING = 10  # flush immediately after this many buffered updates
+_dirty = {}  # {path: pending update count}
+_flush_timers = {}
+_flush_lock = threading.Lock()
+
+# Conditional-GET cache for upstream reads: {(url, params, user_id): (etag, expires_at, body)}
+HTTP_CACHE_TTL = 60  # seconds a cached upstream body is served without revalidating
+CALENDAR_PAST_TTL = 6 * 3600  # finished months only change if a workout is deleted
+_http_cache = {}
+_http_cache_lock = threading.Lock()
+
+# Built /api/templates and /api/templates/export responses: {(kind, user_id): (version, expires_at, data)}.
+# Bumping the version drops every entry at once (template saves, handle type changes).
+TEMPLATES_CACHE_TTL = 600  # 10 minutes
+_templates_cache = {}
+_templates_cache_version = 0
+_templates_cache_lock = threading.Lock()
+
+
+# ── Cached JSON file I/O ──
+
+def _load_json_cached(path, default):
+    """Load a JSON file, re-parsing only when its mtime has changed.
+
+    Returns the cached object itself, so callers that mutate it must save it
+    back. Returns `default` if the file is missing or unreadable.
+    """
+    with _json_cache_lock:
+        if path in _dirty:
+            return _json_cache[path][1]
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return default
+    with _json_cache_lock:
+        cached = _json_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    try:
+        with open(path, "rb") as f:
+            # Take the mtime from the open file so it matches what was read
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+            obj = orjson.loads(f.read())
+    except (orjson.JSONDecodeError, IOError):
+        return default
+    with _json_cache_lock:
+        _json_cache[path] = (mtime, obj)
+        _json_generation[path] = _json_generation.get(path, 0) + 1
+    return obj
+
+
+def json_cache_etag(path):
+    """ETag value (unquoted) for the current cached content of a JSON file."""
+    with _json_cache_lock:
+        return f"{_ETAG_EPOCH}-{_json_generation.get(path, 0)}"
+
+
+def _atomic_write_json(path, obj):
+    """Encode obj once and write it to a temp file, then rename over path.
+
+    Readers never see a truncated file, and the whole payload goes out in a
+    single write() rather than the encoder's many small ones.
+    """
+    data = orjson.dumps(obj)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+def _save_json_cached(path, obj):
+    """Write a JSON file and remember the parsed object under its new mtime."""
+    _atomic_write_json(path, obj)
+    mtime = os.stat(path).st_mtime_ns
+    with _json_cache_lock:
+        _json_cache[path] = (mtime, obj)
+        _json_generation[path] = _json_generation.get(path, 0) + 1
+
+
+def _write_back_json(path, obj):
+    """Update the cached object now and persist it after a short debounce.
+
+    Rapid successive saves (e.g. labelling exercises in the settings page)
+    collapse into one file write. Pending writes are flushed at exit.
+    """
+    with _json_cache_lock:
+        _json_cache[path] = (None, obj)
+        _json_generation[path] = _json_generation.get(path, 0) + 1
+        pending = _dirty.get(path, 0) + 1
+        _dirty[path] = pending
+        timer = _flush_timers.pop(path, None)
+        if timer:
+            timer.cancel()
+        if pending < WRITE_BACK_MAX_PENDING:
+            timer = threading.Timer(WRITE_BACK_DELAY, _flush_json, (path,))
+            timer.daemon = True
+            _flush_timers[path] = timer
+            timer.start()
+            return
+    _flush_json(path)
+
+
+def _flush_json(path):
+    """Write a buffered JSON object to disk if it is still pending."""
+    with _flush_lock:
+        with _json_cache_lock:
+            if path not in _dirty:
+                return
+            del _dirty[path]
+            timer = _flush_timers.pop(path, None)
+            if timer:
+                timer.cancel()
+            obj = _json_cache[path][1]
+        _atomic_write_json(path, obj)
+        mtime = os.stat(path).st_mtime_ns
+        with _json_cache_lock:
+            if path not in _dirty:
+                _json_cache[path] = (mtime, obj)
+
+
+@atexit.register
+def flush_pending_writes():
+    """Flush every buffered JSON write (called at exit)."""
+    with _json_cache_lock:
+        paths = list(_dirty)
+    for path in paths:
+        _flush_json(path)
 
 
 # ── Config file I/O ──
 
 def load_config():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "r") as f:
-            return json.load(f)
-    return {}
+    return _load_json_cached(CONFIG_FILE, {})
 
 
 def save_config(token, user_id, email=None):
     data = {"token": token, "user_id": user_id}
     if email:
         data["email"] = email
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(data, f)
+    _save_json_cached(CONFIG_FILE, data)
 
 
 def clear_config():
-    if os.path.exists(CONFIG_FILE):
+    try:
         os.remove(CONFIG_FILE)
+    except FileNotFoundError:
+        pass
+    with _json_cache_lock:
+        _json_cache.pop(CONFIG_FILE, None)
 
 
 # ── History cache I/O ──
 
-def load_history_cache():
-    """Load persistent training detail cache from disk."""
-    if os.path.exists(HISTORY_CACHE_FILE):
-        try:
-            with open(HISTORY_CACHE_FILE, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {"user_id": None, "trainings": {}, "version": CACHE_VERSION}
+_HISTORY_QUERY_CHUNK = 500  # stay well below SQLite's bound-parameter limit
+
+
+def _init_history_db(conn):
+    """Create the schema and drop rows from an old CACHE_VERSION."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS trainings ("
+        "user_id TEXT NOT NULL, id TEXT NOT NULL, blob BLOB NOT NULL, "
+        "PRIMARY KEY (user_id, id))"
+    )
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is not None and row[0] == str(CACHE_VERSION):
+        return
+    conn.execute("DELETE FROM trainings")
+    conn.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(CACHE_VERSION),)
+    )
+
+
+def _history_db():
+    """Open a connection to the history database (one per call, thread-safe)."""
+    global _history_db_ready
+    conn = sqlite3.connect(HISTORY_DB_FILE, timeout=10)
+    if not _history_db_ready:
+        with _history_db_lock:
+            if not _history_db_ready:
+                with conn:
+                    _init_history_db(conn)
+                _history_db_ready = True
+    return conn
+
+
+def load_history_cache(user_id, training_ids):
+    """Load cached training details for the given training ids only.
+
+    Returns {"user_id", "trainings": {training_id: [exercise, ...]}, "version"};
+    ids with no cached row are simply absent from "trainings".
+    """
+    trainings = {}
+    ids = list(training_ids)
+    with closing(_history_db()) as conn:
+        for i in range(0, len(ids), _HISTORY_QUERY_CHUNK):
+            chunk = ids[i:i + _HISTORY_QUERY_CHUNK]
+            rows = conn.execute(
+                "SELECT id, blob FROM trainings WHERE user_id = ? AND id IN (%s)"
+                % ",".join("?" * len(chunk)),
+                [str(user_id), *chunk],
+            )
+            for tid, blob in rows:
+                trainings[tid] = orjson.loads(blob)
+    return {"user_id": user_id, "trainings": trainings, "version": CACHE_VERSION}
+
 
+def stored_training_ids(user_id):
+    """Return every trainingId with a stored row for the user (ids only, no blobs)."""
+    with closing(_history_db()) as conn:
+        rows = conn.execute("SELECT id FROM trainings WHERE user_id = ?", (str(user_id),))
+        return {tid for tid, in rows}
 
-def save_history_cache(cache):
-    """Save persistent training detail cache to disk."""
-    with open(HISTORY_CACHE_FILE, "w") as f:
-        json.dump(cache, f)
 
+def save_history_cache_entry(user_id, training_id, exercises):
+    """Persist one training's extracted exercises (an O(1) upsert)."""
+    with closing(_history_db()) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO trainings (user_id, id, blob) VALUES (?, ?, ?)",
+            (str(user_id), str(training_id), orjson.dumps(exercises)),
+        )
+
+
+# ── Exercise history snapshot ──
+
+def get_history_snapshot():
+    """Return the current (payload, user_id, fingerprint) history snapshot."""
+    return _history_snapshot
+
+
+def set_history_snapshot(payload, user_id, fingerprint=None):
+    """Publish a new history snapshot (an atomic rebind).
+
+    `fingerprint` is (frozenset of completed trainingIds, frozenset of those in the
+    two most recent months, cutoff date) for the payload; None means it was built
+    from incomplete data and must not be reused.
+    """
+    global _history_snapshot
+    _history_snapshot = (payload, user_id, fingerprint)
+
+
+def clear_history_snapshot():
+    set_history_snapshot(None, None)
+
+
+# ── Mappings I/O (muscle groups, handle types, app settings) ──
+
+def _migrate_legacy_mappings():
+    """Build the unified mappings file from the old per-section files."""
+    data = {
+        "muscle_groups": _load_json_cached(MUSCLE_GROUPS_FILE, {}),
+        "handle_types": _load_json_cached(HANDLE_TYPES_FILE, {}),
+        "settings": _load_json_cached(SETTINGS_FILE, {}),
+    }
+    _save_json_cached(MAPPINGS_FILE, data)
+    return data
+
+
+def load_all_mappings():
+    """Load all mapping sections from the single mappings file.
+
+    Returns {"muscle_groups": {...}, "handle_types": {...}, "settings": {...}}.
+    One file (and one cache entry) serves all three settings endpoints.
+    """
+    data = _load_json_cached(MAPPINGS_FILE, None)
+    if data is None:
+        if os.path.exists(MAPPINGS_FILE):
+            # Present but unreadable: move it aside so the user's mappings
+            # are never overwritten by the (stale) legacy files
+            backup = f"{MAPPINGS_FILE}.corrupt-{int(time.time())}"
+            try:
+                os.replace(MAPPINGS_FILE, backup)
+            except OSError as e:
+                print(f"Unreadable {MAPPINGS_FILE} left in place: {e}")
+                return {"muscle_groups": {}, "handle_types": {}, "settings": {}}
+            print(f"Unreadable {MAPPINGS_FILE} moved to {backup}")
+        data = _migrate_legacy_mappings()
+    return data
+
+
+def _save_mapping_section(section, value):
+    """Replace one section and buffer a write of the whole mappings file."""
+    data = load_all_mappings()
+    data[section] = value
+    _write_back_json(MAPPINGS_FILE, data)
+
+
+def mappings_etag():
+    """ETag for the mappings file; call after loading so external edits are seen."""
+    return json_cache_etag(MAPPINGS_FILE)
 
-# ── Muscle groups I/O ──
 
 def load_muscle_groups():
-    """Load muscle group mappings from disk.
+    """Load muscle group mappings.
 
     Returns dict of {exercise: {primary, secondary, secondaryPercent}}.
     Migrates old flat format (exercise: group_string) on the fly.
     """
-    raw = {}
-    if os.path.exists(MUSCLE_GROUPS_FILE):
-        try:
-            with open(MUSCLE_GROUPS_FILE, "r") as f:
-                raw = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
+    raw = load_all_mappings().setdefault("muscle_groups", {})
 
     # Migrate old flat format → new nested format
     migrated = False
@@ -105,110 +423,241 @@ def load_muscle_groups():
 
 
 def save_muscle_groups(mapping):
-    """Save muscle group mappings to disk."""
-    with open(MUSCLE_GROUPS_FILE, "w") as f:
-        json.dump(mapping, f)
+    """Save muscle group mappings (buffered, written to disk after a short delay)."""
+    _save_mapping_section("muscle_groups", mapping)
 
 
-# ── Handle types I/O ──
-
 def load_handle_types():
-    """Load handle type mappings from disk."""
-    if os.path.exists(HANDLE_TYPES_FILE):
-        try:
-            with open(HANDLE_TYPES_FILE, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
+    """Load handle type mappings."""
+    return load_all_mappings().setdefault("handle_types", {})
 
 
 def save_handle_types(mapping):
-    """Save handle type mappings to disk."""
-    with open(HANDLE_TYPES_FILE, "w") as f:
-        json.dump(mapping, f)
-
+    """Save handle type mappings (buffered, written to disk after a short delay)."""
+    _save_mapping_section("handle_types", mapping)
+    # Template planned volumes depend on handle types
+    invalidate_templates_cache()
 
-# ── App settings I/O ──
 
 def load_settings():
-    """Load app settings from disk."""
-    if os.path.exists(SETTINGS_FILE):
-        try:
-            with open(SETTINGS_FILE, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
+    """Load app settings."""
+    return load_all_mappings().setdefault("settings", {})
 
 
 def save_settings(settings):
-    """Save app settings to disk."""
-    with open(SETTINGS_FILE, "w") as f:
-        json.dump(settings, f)
+    """Save app settings (buffered, written to disk after a short delay)."""
+    _save_mapping_section("settings", settings)
 
 
 # ── HTTP headers ──
 
+# Static header blocks, built once; the per-request fields are filled in on a copy
+_LOGIN_HEADERS_BASE = {
+    "Host": HOST,
+    "User-Agent": "Dart/3.9 (dart:io)",
+    "Content-Type": "application/json",
+    "Timestamp": "",
+    "Utc_offset": "+0000",
+    "Versioncode": "40304",
+    "Mobiledevices": MOBILE_DEVICES,
+    "Timezone": "GMT",
+    "Accept-Language": "en",
+    "App_type": "SOFTWARE",
+}
+
+_AUTH_HEADERS_BASE = {
+    "Host": HOST,
+    "App_user_id": "",
+    "Token": "",
+    "Timestamp": "",
+    "Versioncode": "40304",
+    "Mobiledevices": MOBILE_DEVICES,
+    "Content-Type": "application/json",
+    "User-Agent": "Dart/3.9 (dart:io)",
+}
+
+
+_time_ns = time.time_ns
+
+
 def login_headers():
-    return {
-        "Host": HOST,
-        "User-Agent": "Dart/3.9 (dart:io)",
-        "Content-Type": "application/json",
-        "Timestamp": str(int(time.time() * 1000)),
-        "Utc_offset": "+0000",
-        "Versioncode": "40304",
-        "Mobiledevices": MOBILE_DEVICES,
-        "Timezone": "GMT",
-        "Accept-Language": "en",
-        "App_type": "SOFTWARE",
-    }
+    h = _LOGIN_HEADERS_BASE.copy()
+    h["Timestamp"] = str(_time_ns() // 1_000_000)
+    return h
+
+
+@functools.lru_cache(maxsize=8)
+def _auth_headers_template(token, user_id):
+    """Auth header block for one login, minus Timestamp. Callers must copy it."""
+    h = _AUTH_HEADERS_BASE.copy()
+    h["App_user_id"] = user_id
+    h["Token"] = token
+    return h
 
 
 def auth_headers(token=None, user_id=None):
     """Build auth headers. Uses Flask session by default, or explicit params for threads."""
-    return {
-        "Host": HOST,
-        "App_user_id": user_id or session.get("user_id", ""),
-        "Token": token or session.get("token", ""),
-        "Timestamp": str(int(time.time() * 1000)),
-        "Versioncode": "40304",
-        "Mobiledevices": MOBILE_DEVICES,
-        "Content-Type": "application/json",
-        "User-Agent": "Dart/3.9 (dart:io)",
-    }
+    if not (token and user_id):
+        get = session.get
+        token = token or get("token", "")
+        user_id = user_id or get("user_id", "")
+    h = _auth_headers_template(token, user_id).copy()
+    h["Timestamp"] = str(_time_ns() // 1_000_000)
+    return h
+
+
+def response_json(resp):
+    """Decode a requests response body with orjson, straight from the raw bytes.
+
+    Raises orjson.JSONDecodeError (a ValueError) if the body is not JSON.
+    """
+    return orjson.loads(resp.content)
+
+
+def response_data(resp):
+    """Decode a response once and return (body, body["data"] or None)."""
+    body = orjson.loads(resp.content)
+    return body, body.get("data")
+
+
+def cached_get(url, params, headers, ttl=HTTP_CACHE_TTL, timeout=None):
+    """GET an upstream JSON endpoint through the conditional-GET cache (thread-safe).
+
+    For `ttl` seconds after it was fetched the cached body is returned without
+    a request (the TTL is fixed when the body is stored). After that the
+    request carries If-None-Match when the upstream sent an ETag, and a 304
+    keeps the cached body. Returns the decoded body, or None on a non-200
+    response; raises RequestException / ValueError like a plain GET would.
+    The returned body is shared, so callers must not mutate it.
+    """
+    key = (url, tuple(sorted(params.items())), headers.get("App_user_id"))
+    with _http_cache_lock:
+        entry = _http_cache.get(key)
+    if entry is not None:
+        etag, expires_at, body = entry
+        if time.time() < expires_at:
+            return body
+        if etag:
+            headers = {**headers, "If-None-Match": etag}
+
+    resp = SESSION.get(url, params=params, headers=headers, timeout=timeout)
+    if resp.status_code == 304 and entry is not None:
+        with _http_cache_lock:
+            _http_cache[key] = (etag, time.time() + ttl, body)
+        return body
+    if resp.status_code != 200:
+        return None
+    body = response_json(resp)
+    # Never cache an expired-session reply; the caller clears the session on it
+    if body.get("code") != 91:
+        with _http_cache_lock:
+            _http_cache[key] = (resp.headers.get("ETag"), time.time() + ttl, body)
+    return body
+
+
+def invalidate_cached_get(user_id=None):
+    """Drop cached upstream bodies for one user, or for everyone."""
+    with _http_cache_lock:
+        if user_id is None:
+            _http_cache.clear()
+        else:
+            for key in [k for k in _http_cache if k[2] == user_id]:
+                del _http_cache[key]
+
+
+def get_templates_cache(kind, user_id):
+    """Return the cached templates response for (kind, user_id), or None if stale."""
+    with _templates_cache_lock:
+        entry = _templates_cache.get((kind, user_id))
+        if entry is None:
+            return None
+        version, expires_at, data = entry
+        if version != _templates_cache_version or time.time() >= expires_at:
+            del _templates_cache[(kind, user_id)]
+            return None
+        return data
+
+
+def set_templates_cache(kind, user_id, data):
+    with _templates_cache_lock:
+        _templates_cache[(kind, user_id)] = (_templates_cache_version, time.time() + TEMPLATES_CACHE_TTL, data)
+
+
+def invalidate_templates_cache():
+    """Invalidate every cached templates response by bumping the version."""
+    global _templates_cache_version
+    with _templates_cache_lock:
+        _templates_cache_version += 1
 
 
 def check_session_expired(body):
     """Check if API response indicates session expiry. Returns error response or None."""
     if body.get("code") == 91:
+        invalidate_cached_get(session.get("user_id"))
         session.clear()
         clear_config()
+        clear_history_snapshot()
         return jsonify({"ok": False, "error": "Session expired"}), 401
     return None
 
 
-def fetch_calendar_months(n_months, headers):
-    """Fetch n_months of calendar data sequentially. Returns (all_days, error_response)."""
-    all_days = []
+def _fetch_calendar_month(month_str, headers):
+    """Fetch one month of calendar data (thread-safe). Returns parsed body or None."""
+    # Only the current month gains workouts, so past months are kept much longer
+    is_current = month_str == datetime.now().strftime("%Y-%m")
+    try:
+        return cached_get(
+            f"{BASE_URL}/api/app/v5/trainingCalendar/monthNew",
+            {"date": month_str, "selectedDeviceType": DEVICE_TYPE},
+            headers,
+            ttl=HTTP_CACHE_TTL if is_current else CALENDAR_PAST_TTL,
+        )
+    except (requests.RequestException, ValueError):
+        pass
+    return None
+
+
+def calendar_months(n_months):
+    """Return the YYYY-MM strings for the current month and the n_months - 1 before it."""
     today = datetime.now()
-    for months_back in range(n_months):
-        dt = today - timedelta(days=months_back * 30)
-        month_str = dt.strftime("%Y-%m")
-        try:
-            resp = requests.get(
-                f"{BASE_URL}/api/app/v5/trainingCalendar/monthNew",
-                params={"date": month_str, "selectedDeviceType": DEVICE_TYPE},
-                headers=headers,
-            )
-            if resp.status_code == 200:
-                body = resp.json()
-                expired = check_session_expired(body)
-                if expired:
-                    return None, expired
-                days = body.get("data", [])
-                if days:
-                    all_days.extend(days)
-        except requests.RequestException:
+    return [
+        (today - timedelta(days=months_back * 30)).strftime("%Y-%m")
+        for months_back in range(n_months)
+    ]
+
+
+def fetch_calendar_months(n_months, headers, on_month=None):
+    """Fetch n_months of calendar data in parallel.
+
+    Returns (all_days, failed_months, error_response); a month whose fetch
+    failed is left out of all_days and listed in failed_months.
+
+    `on_month(days)`, if given, is called on the worker thread as soon as each
+    month arrives, so dependent work can start before the slowest month lands.
+    It must not wait on EXECUTOR futures.
+    """
+    def _fetch(month_str):
+        body = _fetch_calendar_month(month_str, headers)
+        if on_month is not None and body is not None and body.get("code") != 91:
+            days = body.get("data")
+            if days:
+                on_month(days)
+        return body
+
+    months = calendar_months(n_months)
+    bodies = list(EXECUTOR.map(_fetch, months))
+
+    # Session expiry is handled here, on the request thread, in month order
+    all_days = []
+    failed = []
+    for month_str, body in zip(months, bodies):
+        if body is None:
+            failed.append(month_str)
             continue
-    return all_days, None
+        expired = check_session_expired(body)
+        if expired:
+            return None, None, expired
+        days = body.get("data", [])
+        if days:
+            all_days.extend(days)
+    return all_days, failed, None
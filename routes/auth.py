@@ -1,16 +1,21 @@
 """auth.py — Authentication routes (login, logout, check, index)."""
 
-import requests as http_requests
+from concurrent.futures import ThreadPoolExecutor
+
 from flask import Blueprint, render_template, request, jsonify, session
 
 from helpers import (
     load_config, save_config, clear_config,
-    login_headers, BASE_URL,
-    exercise_history_cache, cache_lock,
+    login_headers, response_json, BASE_URL, SESSION,
+    clear_history_snapshot, invalidate_cached_get, invalidate_templates_cache,
 )
+from routes.workouts import clear_aggregate_state
 
 auth_bp = Blueprint("auth", __name__)
 
+# Single worker so config writes and removals hit the disk in request order
+_io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="config-io")
+
 
 @auth_bp.route("/")
 def index():
@@ -22,6 +27,10 @@ def check_auth():
     """Check if we have a saved session (from config file or session)."""
     if session.get("token"):
         return jsonify({"ok": True, "email": session.get("email", "")})
+    # Config was already consulted for this session and had no saved login
+    if session.get("checked"):
+        return jsonify({"ok": False})
+    session["checked"] = True
     cfg = load_config()
     if cfg.get("token") and cfg.get("user_id"):
         session["token"] = cfg["token"]
@@ -43,7 +52,7 @@ def login():
     headers = login_headers()
 
     # Step 1: Verify identity
-    resp = http_requests.post(
+    resp = SESSION.post(
         f"{BASE_URL}/api/app/v2/login/verifyIdentity",
         json={"type": 2, "userIdentity": email},
         headers=headers,
@@ -51,14 +60,17 @@ def login():
     if resp.status_code != 200:
         return jsonify({"ok": False, "error": f"Verify failed ({resp.status_code})"}), 502
 
-    verify = resp.json().get("data", {})
+    try:
+        verify = response_json(resp).get("data", {})
+    except ValueError:
+        return jsonify({"ok": False, "error": "Invalid verify response"}), 502
     if not verify.get("isExist"):
         return jsonify({"ok": False, "error": "Account does not exist"}), 401
     if not verify.get("hasPwd"):
         return jsonify({"ok": False, "error": "No password set on this account"}), 401
 
     # Step 2: Login
-    resp = http_requests.post(
+    resp = SESSION.post(
         f"{BASE_URL}/api/app/v2/login/byPass",
         json={"userIdentity": email, "password": password, "type": 2},
         headers=headers,
@@ -66,7 +78,10 @@ def login():
     if resp.status_code != 200:
         return jsonify({"ok": False, "error": "Login failed"}), 401
 
-    login_data = resp.json().get("data", {})
+    try:
+        login_data = response_json(resp).get("data", {})
+    except ValueError:
+        return jsonify({"ok": False, "error": "Invalid login response"}), 502
     token = login_data.get("token")
     user_id = login_data.get("appUserId")
 
@@ -76,17 +91,20 @@ def login():
     session["token"] = token
     session["user_id"] = str(user_id)
     session["email"] = email
-    save_config(token, str(user_id), email)
+    _io_executor.submit(save_config, token, str(user_id), email)
+    clear_history_snapshot()
 
     return jsonify({"ok": True, "email": email})
 
 
 @auth_bp.route("/logout", methods=["POST"])
 def logout():
+    invalidate_cached_get(session.get("user_id"))
+    clear_aggregate_state(session.get("user_id"))
+    invalidate_templates_cache()
     session.clear()
-    clear_config()
-    with cache_lock:
-        exercise_history_cache["data"] = None
-        exercise_history_cache["timestamp"] = 0
-        exercise_history_cache["user_id"] = None
+    # config.json is removed in the background; don't let /api/check restore it meanwhile
+    session["checked"] = True
+    _io_executor.submit(clear_config)
+    clear_history_snapshot()
     return jsonify({"ok": True})
@@ -1,40 +1,77 @@
 """settings.py — Muscle group and handle type mapping routes."""
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 
 from helpers import (
     load_muscle_groups, save_muscle_groups,
     load_handle_types, save_handle_types,
     load_settings, save_settings,
+    mappings_etag,
 )
 
 settings_bp = Blueprint("settings", __name__)
 
 
+def _conditional_mapping_response(mapping):
+    """Return the mapping as JSON, or an empty 304 if the client's ETag is current."""
+    etag = mappings_etag()
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = jsonify({"ok": True, "mapping": mapping})
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = "no-cache"  # always revalidate
+    return resp
+
+
 @settings_bp.route("/api/muscle-groups")
 def get_muscle_groups():
     """Return saved muscle group mappings."""
-    return jsonify({"ok": True, "mapping": load_muscle_groups()})
+    return _conditional_mapping_response(load_muscle_groups())
+
+
+def _mapping_updates(data):
+    """Return the list of updates in a POST body: {mappings: [...]} or a single update.
+
+    Returns None if the body isn't a JSON object, or the batch isn't a list of
+    objects each naming its exercise with a non-empty string.
+    """
+    if not isinstance(data, dict):
+        return None
+    updates = data.get("mappings", [data])
+    if not isinstance(updates, list) or not all(
+            isinstance(u, dict) and isinstance(u.get("exercise"), str) and u["exercise"]
+            for u in updates):
+        return None
+    return updates
 
 
 @settings_bp.route("/api/muscle-groups", methods=["POST"])
 def save_muscle_group():
-    """Save a single exercise-to-muscle-group mapping."""
-    data = request.get_json()
-    exercise = data.get("exercise")
-    group = data.get("group")
-    if not exercise or not group:
+    """Save exercise-to-muscle-group mappings (one update, or a batch under "mappings")."""
+    updates = _mapping_updates(request.get_json(silent=True))
+    if updates is None or any(not u.get("exercise") or not u.get("group") for u in updates):
         return jsonify({"ok": False, "error": "Missing exercise or group"}), 400
     mapping = load_muscle_groups()
-    existing = mapping.get(exercise, {"primary": "Other", "secondary": "None", "secondaryPercent": 50})
-    # Accept optional secondary fields
-    existing["primary"] = group
-    if "secondary" in data:
-        existing["secondary"] = data["secondary"]
-    if "secondaryPercent" in data:
-        pct = data["secondaryPercent"]
-        existing["secondaryPercent"] = max(0, min(100, int(pct)))
-    mapping[exercise] = existing
+    # Build every new entry before touching the shared mapping, so a bad item
+    # leaves the whole batch unapplied
+    entries = {}
+    for u in updates:
+        exercise = u["exercise"]
+        entry = dict(entries.get(exercise) or mapping.get(exercise)
+                     or {"primary": "Other", "secondary": "None", "secondaryPercent": 50})
+        # Accept optional secondary fields
+        entry["primary"] = u["group"]
+        if "secondary" in u:
+            entry["secondary"] = u["secondary"]
+        if "secondaryPercent" in u:
+            try:
+                pct = int(u["secondaryPercent"])
+            except (TypeError, ValueError):
+                return jsonify({"ok": False, "error": "Invalid secondaryPercent"}), 400
+            entry["secondaryPercent"] = max(0, min(100, pct))
+        entries[exercise] = entry
+    mapping.update(entries)
     save_muscle_groups(mapping)
     return jsonify({"ok": True})
 
@@ -42,19 +79,18 @@ def save_muscle_group():
 @settings_bp.route("/api/handle-types")
 def get_handle_types():
     """Return saved handle type mappings."""
-    return jsonify({"ok": True, "mapping": load_handle_types()})
+    return _conditional_mapping_response(load_handle_types())
 
 
 @settings_bp.route("/api/handle-types", methods=["POST"])
 def save_handle_type():
-    """Save a single exercise-to-handle-type mapping."""
-    data = request.get_json()
-    exercise = data.get("exercise")
-    handle_type = data.get("handleType")
-    if not exercise or not handle_type:
+    """Save exercise-to-handle-type mappings (one update, or a batch under "mappings")."""
+    updates = _mapping_updates(request.get_json(silent=True))
+    if updates is None or any(not u.get("exercise") or not u.get("handleType") for u in updates):
         return jsonify({"ok": False, "error": "Missing exercise or handleType"}), 400
     mapping = load_handle_types()
-    mapping[exercise] = handle_type
+    for u in updates:
+        mapping[u["exercise"]] = u["handleType"]
     save_handle_types(mapping)
     return jsonify({"ok": True})
 
@@ -1,74 +1,128 @@
 """workouts.py — Workout list, detail, exercise history, and debug routes."""
 
-import time
+import threading
+from sys import intern
+from operator import itemgetter
+from itertools import zip_longest
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
 
 import requests as http_requests
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, Response, jsonify, request, session
 
 from helpers import (
-    BASE_URL, DEVICE_TYPE,
-    auth_headers, check_session_expired, fetch_calendar_months,
-    load_history_cache, save_history_cache, load_handle_types,
-    exercise_history_cache, cache_lock, CACHE_TTL, CACHE_VERSION,
+    BASE_URL, DEVICE_TYPE, SESSION, EXECUTOR,
+    auth_headers, response_json, response_data, cached_get, invalidate_cached_get,
+    get_templates_cache, set_templates_cache, invalidate_templates_cache,
+    check_session_expired, calendar_months, fetch_calendar_months,
+    load_history_cache, stored_training_ids, save_history_cache_entry, load_handle_types,
+    get_history_snapshot, set_history_snapshot, CACHE_VERSION,
 )
 
 workouts_bp = Blueprint("workouts", __name__)
 
+# Cold-cache history hydration runs here, detached from the request: {user_id: Future}.
+# Kept apart from EXECUTOR because a hydration job waits on the detail fetches it submits there.
+HYDRATE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hydrate")
+HYDRATE_WAIT = 2.0  # seconds a request waits for hydration before returning partial data
+_hydrations = {}
+_hydrations_lock = threading.Lock()
 
-def _fetch_training_detail(training_id, token, user_id):
-    """Fetch completed workout detail for a single training_id (thread-safe)."""
-    headers = auth_headers(token, user_id)
+
+def _fetch_training_detail(training_id, headers):
+    """Fetch completed workout detail for a single training_id (thread-safe).
+
+    `headers` is built once per request and shared read-only across workers.
+    """
     try:
-        resp = http_requests.get(
+        resp = SESSION.get(
             f"{BASE_URL}/api/app/cttTrainingInfo/{training_id}",
             headers=headers,
             timeout=15,
         )
-        body = resp.json()
-        if body.get("data"):
-            return body["data"]
+        _, data = response_data(resp)
+        if data:
+            return data
     except Exception:
         pass
     return None
 
 
+def _extract_exercises(training):
+    """Reduce a training detail to [{name, volume, max_weight}, ...], one per exercise."""
+    exercises = (
+        training.get("cttActionLibraryTrainingInfoList")
+        or training.get("actionLibraryTrainingInfoList")
+        or []
+    )
+    extracted = []
+    for ex in exercises:
+        name = intern((ex.get("actionLibraryName") or ex.get("name") or "Unknown").strip())
+        vol = 0.0
+        max_wt = 0.0
+        for s in ex.get("finishedReps") or []:
+            cap = float(s.get("capacity") or 0)
+            vol += cap
+            if cap > 0.0:
+                reps = float(s.get("finishedCount") or 0)
+                if reps > 0.0:
+                    wt = cap / reps
+                    if wt > max_wt:
+                        max_wt = wt
+        # Stored unrounded; _aggregate rounds once when building the response
+        extracted.append({"name": name, "volume": vol, "max_weight": max_wt})
+    return extracted
+
+
+def _fetch_and_store_detail(w, headers, user_id):
+    """Fetch one workout's detail, extract and persist it. Returns the exercises, or None.
+
+    Persisting on the worker means no fetched detail is lost, whichever
+    request or hydration job ends up (or never ends up) collecting the Future.
+    """
+    training = _fetch_training_detail(w["trainingId"], headers)
+    if not training:
+        return None
+    extracted = _extract_exercises(training)
+    save_history_cache_entry(user_id, w["tid"], extracted)
+    return extracted
+
+
 @workouts_bp.route("/api/workouts")
 def get_workouts():
     if not session.get("token"):
         return jsonify({"ok": False, "error": "Not logged in"}), 401
 
     headers = auth_headers()
-    all_days, err = fetch_calendar_months(3, headers)
+    all_days, _, err = fetch_calendar_months(3, headers)
     if err:
         return err
 
-    workouts = []
-    for day in all_days:
-        plans = day.get("trainingPlanList") or []
-        if not plans:
-            continue
-        for plan in plans:
-            workouts.append({
-                "date": day.get("date", ""),
-                "name": plan.get("title", "Workout"),
-                "code": plan.get("code", ""),
-                "templateId": plan.get("templateId"),
-                "trainingId": plan.get("trainingId"),
-                "isFinish": plan.get("isFinish", 0),
-                "actionNum": plan.get("actionNum", 0),
-                "calorie": plan.get("calorie", 0),
-                "durationMinute": plan.get("durationMinute", 0),
-                "trainingTime": plan.get("trainingTime", 0),
-                "finishTime": plan.get("finishTime", ""),
-                "totalCapacity": plan.get("totalCapacity", 0),
-                "type": plan.get("type"),
-                "deviceType": plan.get("deviceType"),
-                "img": plan.get("img", ""),
-            })
-
-    workouts.sort(key=lambda w: w["date"], reverse=True)
+    # One comprehension over every (day, plan) pair: no per-item append calls
+    workouts = [
+        {
+            "date": day.get("date", ""),
+            "name": plan.get("title", "Workout"),
+            "code": plan.get("code", ""),
+            "templateId": plan.get("templateId"),
+            "trainingId": plan.get("trainingId"),
+            "isFinish": plan.get("isFinish", 0),
+            "actionNum": plan.get("actionNum", 0),
+            "calorie": plan.get("calorie", 0),
+            "durationMinute": plan.get("durationMinute", 0),
+            "trainingTime": plan.get("trainingTime", 0),
+            "finishTime": plan.get("finishTime", ""),
+            "totalCapacity": plan.get("totalCapacity", 0),
+            "type": plan.get("type"),
+            "deviceType": plan.get("deviceType"),
+            "img": plan.get("img", ""),
+        }
+        for day in all_days
+        for plan in day.get("trainingPlanList") or ()
+    ]
+
+    workouts.sort(key=itemgetter("date"), reverse=True)
     return jsonify({"ok": True, "workouts": workouts})
 
 
@@ -76,123 +130,291 @@ def get_workouts():
 
 def _extract_completed(all_days):
     """Extract completed workout references from calendar data."""
-    completed = []
-    for day in all_days:
-        plans = day.get("trainingPlanList") or []
-        for plan in plans:
-            if plan.get("isFinish") == 1 and plan.get("trainingId"):
-                completed.append({
-                    "date": day.get("date", ""),
-                    "trainingId": plan["trainingId"],
-                    "finishTime": plan.get("finishTime", ""),
-                })
-    return completed
-
-
-def _fetch_uncached_details(completed, history_cache, token, user_id):
-    """Fetch training details not yet in cache. Returns updated cache."""
-    cached_ids = set(history_cache.get("trainings", {}).keys())
-    to_fetch = [w for w in completed if str(w["trainingId"]) not in cached_ids]
+    return [
+        {
+            "date": day.get("date", ""),
+            "trainingId": plan["trainingId"],
+            "tid": str(plan["trainingId"]),  # cache key, stringified once
+            "finishTime": plan.get("finishTime", ""),
+        }
+        for day in all_days
+        for plan in day.get("trainingPlanList") or ()
+        if plan.get("isFinish") == 1 and plan.get("trainingId")
+    ]
+
+
+def _fetch_uncached_details(to_fetch, headers, user_id, prefetched=None):
+    """Fetch and store the details of workouts missing from the store.
 
+    Returns {tid: [exercise, ...]} for the details fetched; failed ones are absent.
+    `prefetched` maps tid → Future for detail fetches already started while the
+    calendar was still loading; those are reused instead of submitted again.
+    """
+    trainings = {}
     if not to_fetch:
-        return history_cache
+        return trainings
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_workout = {
-            executor.submit(_fetch_training_detail, w["trainingId"], token, user_id): w
-            for w in to_fetch
-        }
-        for future in as_completed(future_to_workout):
-            w = future_to_workout[future]
-            training = future.result()
-            if not training:
-                continue
-            exercises = (
-                training.get("cttActionLibraryTrainingInfoList")
-                or training.get("actionLibraryTrainingInfoList")
-                or []
-            )
-            extracted = []
-            for ex in exercises:
-                name = (ex.get("actionLibraryName") or ex.get("name") or "Unknown").strip()
-                sets = ex.get("finishedReps") or []
-                vol = sum(float(s.get("capacity", 0) or 0) for s in sets)
-                max_wt = 0
-                for s in sets:
-                    cap = float(s.get("capacity", 0) or 0)
-                    reps = float(s.get("finishedCount", 0) or 0)
-                    if cap > 0 and reps > 0:
-                        max_wt = max(max_wt, cap / reps)
-                extracted.append({"name": name, "volume": round(vol, 1), "max_weight": round(max_wt, 1)})
-            history_cache["trainings"][str(w["trainingId"])] = extracted
-
-    save_history_cache(history_cache)
-    return history_cache
-
-
-def _build_exercise_results(completed, history_cache, cutoff_date):
-    """Build filtered exercise history list from completed workouts and cache."""
-    exercise_map = {}
-    for w in completed:
-        tid = str(w["trainingId"])
-        exercises = history_cache.get("trainings", {}).get(tid, [])
+    prefetched = prefetched or {}
+    future_to_workout = {
+        (prefetched.get(w["tid"])
+         or EXECUTOR.submit(_fetch_and_store_detail, w, headers, user_id)): w
+        for w in to_fetch
+    }
+    # Each worker persists its detail as it arrives, so a crash mid-batch keeps finished work
+    for future in as_completed(future_to_workout):
+        extracted = future.result()
+        if extracted is not None:
+            trainings[future_to_workout[future]["tid"]] = extracted
+
+    return trainings
+
+
+# (day, cutoff string) for the 14-day "recent exercise" window; rebound once a day
+_cutoff_cache = (None, None)
+
+
+def _cutoff_14d():
+    """Return the date 14 days ago as YYYY-MM-DD, recomputed only when the day changes."""
+    global _cutoff_cache
+    today = datetime.now().date()
+    day, cutoff = _cutoff_cache
+    if day != today:
+        cutoff = (today - timedelta(days=14)).strftime("%Y-%m-%d")
+        _cutoff_cache = (today, cutoff)
+    return cutoff
+
+
+def _start_hydration(to_fetch, headers, user_id, prefetched=None):
+    """Return the user's running hydration Future, submitting one if none is running.
+
+    The background job persists each detail as it arrives, so later requests
+    pick the results up from the store.
+    """
+    with _hydrations_lock:
+        future = _hydrations.get(user_id)
+        if future is not None and not future.done():
+            return future
+        future = HYDRATE_POOL.submit(_fetch_uncached_details, to_fetch, headers, user_id, prefetched)
+        _hydrations[user_id] = future
+    # Outside the lock: the callback runs immediately if the job already finished
+    future.add_done_callback(lambda f: _forget_hydration(user_id, f))
+    return future
+
+
+def _hydration_running(user_id):
+    with _hydrations_lock:
+        future = _hydrations.get(user_id)
+    return future is not None and not future.done()
+
+
+def _forget_hydration(user_id, future):
+    with _hydrations_lock:
+        if _hydrations.get(user_id) is future:
+            del _hydrations[user_id]
+
+
+def _new_exercise_entry():
+    """Per-exercise aggregate: session tuples (date, volume, max_weight), daily volume, overall max."""
+    return {"count": 0, "sessions": [], "daily": defaultdict(float), "max_weight": 0.0, "sorted": True}
+
+
+def _new_aggregate_state():
+    return {
+        "version": CACHE_VERSION,
+        "seen": set(),  # trainingIds already merged into the maps below
+        "exercise_map": defaultdict(_new_exercise_entry),
+        "daily_vol_map": defaultdict(float),
+        "exercise_last_time": {},
+    }
+
+
+def _merge_workouts(state, workouts, trainings):
+    """Fold workouts whose details are stored into the aggregate state."""
+    exercise_map = state["exercise_map"]
+    daily_vol_map = state["daily_vol_map"]
+    exercise_last_time = state["exercise_last_time"]
+    mark_seen = state["seen"].add
+    get_exercises = trainings.get
+    # Visiting workouts in date order leaves every exercise's sessions already sorted
+    for w in sorted(workouts, key=itemgetter("date")):
+        tid = w["tid"]
+        exercises = get_exercises(tid)
+        if exercises is None:
+            continue  # not fetched yet; merged once it is
+        mark_seen(tid)
+        # Interned so the long-lived state holds one copy of each date and name,
+        # and dict lookups against it hit the identity fast path
+        date = intern(w["date"])
+        finish_time = w.get("finishTime", "")
+        day_total = 0
         for ex in exercises:
             vol = ex["volume"]
             if vol <= 0:
                 continue
-            name = ex["name"]
-            if name not in exercise_map:
-                exercise_map[name] = {"count": 0, "sessions": []}
-            exercise_map[name]["count"] += 1
-            exercise_map[name]["sessions"].append({
-                "date": w["date"],
-                "volume": vol,
-                "max_weight": ex.get("max_weight", 0),
-            })
+            day_total += vol
+            name = intern(ex["name"])
+            entry = exercise_map[name]
+            entry["count"] += 1
+            sessions = entry["sessions"]
+            if sessions and date < sessions[-1][0]:
+                entry["sorted"] = False  # an older workout arrived late
+            max_weight = ex.get("max_weight", 0)
+            if max_weight > entry["max_weight"]:
+                entry["max_weight"] = max_weight
+            sessions.append((date, vol, max_weight))
+            entry["daily"][date] += vol
+            if finish_time:
+                last = exercise_last_time.get(name)
+                if not last or finish_time > last:
+                    exercise_last_time[name] = finish_time
+        if day_total > 0:
+            daily_vol_map[date] += day_total
+
 
+def _emit_aggregate(state, cutoff_date):
+    """Build the response lists and maps from the aggregate state, as fresh objects."""
     result = []
-    for name, data in sorted(exercise_map.items()):
-        data["sessions"].sort(key=lambda s: s["date"])
-        if data["sessions"][-1]["date"] < cutoff_date:
+    exercise_daily = {}
+    for name, data in sorted(state["exercise_map"].items()):
+        exercise_daily[name] = {d: round(v, 1) for d, v in data["daily"].items()}
+        sessions = data["sessions"]
+        if not data["sorted"]:
+            sessions.sort(key=itemgetter(0))
+            data["sorted"] = True
+        if sessions[-1][0] < cutoff_date:
             continue
-        overall_max_weight = max((s.get("max_weight", 0) for s in data["sessions"]), default=0)
+        # The full history is served separately (/api/exercise-history/full)
+        dates, volumes, max_weights = zip(*sessions[-20:])
+        dates = list(dates)
+        volumes = [round(v, 1) for v in volumes]
+        max_weights = [round(m, 1) for m in max_weights]
         result.append({
             "name": name,
             "count": data["count"],
-            "history": data["sessions"][-20:],
-            "all_history": data["sessions"],
-            "max_weight": round(overall_max_weight, 1),
+            "history": {"dates": dates, "volumes": volumes, "max_weights": max_weights},
+            "max_weight": round(data["max_weight"], 1),
         })
-    return result
 
+    # Parallel arrays rather than {date, volume} rows: far fewer bytes on the wire
+    sorted_items = sorted(state["daily_vol_map"].items())
+    daily_volume = {
+        "dates": [d for d, _ in sorted_items],
+        "volumes": [round(v, 1) for _, v in sorted_items],
+    }
+    return result, daily_volume, exercise_daily, dict(state["exercise_last_time"])
 
-def _build_daily_volumes(completed, history_cache):
-    """Build daily volume totals and per-exercise daily maps."""
-    daily_vol_map = {}
-    exercise_daily = {}
-    exercise_last_time = {}
-    for w in completed:
-        tid = str(w["trainingId"])
-        date = w["date"]
-        finish_time = w.get("finishTime", "")
-        exercises = history_cache.get("trainings", {}).get(tid, [])
-        day_total = 0
-        for ex in exercises:
-            vol = ex["volume"]
-            if vol <= 0:
-                continue
-            day_total += vol
-            name = ex["name"]
-            if name not in exercise_daily:
-                exercise_daily[name] = {}
-            exercise_daily[name][date] = exercise_daily[name].get(date, 0) + round(vol, 1)
-            if finish_time and (name not in exercise_last_time or finish_time > exercise_last_time[name]):
-                exercise_last_time[name] = finish_time
-        if day_total > 0:
-            daily_vol_map[date] = daily_vol_map.get(date, 0) + day_total
 
-    daily_volume = [{"date": d, "volume": round(v, 1)} for d, v in sorted(daily_vol_map.items())]
-    return daily_volume, exercise_daily, exercise_last_time
+# Running aggregation per user, least recently served first; updated in place under the lock
+AGGREGATE_MAX_USERS = 8
+_aggregate_states = OrderedDict()
+_aggregate_lock = threading.Lock()
+
+
+def _user_aggregate_state(user_id, completed):
+    """Return the user's aggregate state, fresh if it is stale. Call with the lock held.
+
+    The state is rebuilt from scratch for a new CACHE_VERSION, or when a
+    previously merged workout has disappeared from the calendar.
+    """
+    state = _aggregate_states.get(user_id)
+    if (state is None or state["version"] != CACHE_VERSION
+            or not state["seen"].issubset(w["tid"] for w in completed)):
+        state = _aggregate_states[user_id] = _new_aggregate_state()
+    _aggregate_states.move_to_end(user_id)
+    while len(_aggregate_states) > AGGREGATE_MAX_USERS:
+        _aggregate_states.popitem(last=False)
+    return state
+
+
+def _merge_unseen(state, completed, user_id, fetched):
+    """Merge the workouts the state hasn't seen, loading only their stored details.
+
+    `fetched` holds details this request already has in memory ({tid: exercises}).
+    """
+    seen = state["seen"]
+    unseen = [w for w in completed if w["tid"] not in seen]
+    if not unseen:
+        return
+    trainings = load_history_cache(
+        user_id, [w["tid"] for w in unseen if w["tid"] not in fetched])["trainings"]
+    trainings.update(fetched)
+    _merge_workouts(state, unseen, trainings)
+
+
+def _aggregate(completed, user_id, fetched, read):
+    """Merge unseen workouts into the user's aggregate, then return `read(state)`.
+
+    Only workouts not merged by an earlier request are folded in. `read` runs
+    with the lock still held, so it sees exactly the state this merge produced.
+    """
+    with _aggregate_lock:
+        state = _user_aggregate_state(user_id, completed)
+        _merge_unseen(state, completed, user_id, fetched)
+        return read(state)
+
+
+def clear_aggregate_state(user_id):
+    """Drop a user's in-memory aggregate (on logout)."""
+    with _aggregate_lock:
+        _aggregate_states.pop(user_id, None)
+
+
+def _fetch_completed(user_id, headers):
+    """Fetch 13 months of calendar and extract the completed workouts.
+
+    Returns (completed, failed_months, stored, prefetched, error_response):
+    `failed_months` lists months whose fetch failed (their workouts are missing),
+    `stored` is the set of trainingIds already in the store, `prefetched` maps
+    tid → Future for details whose fetch started as their month arrived.
+    """
+    # Pipeline the two fetch stages: as each month arrives, start fetching its
+    # unstored training details instead of waiting for all 13 months first.
+    # Skipped while a hydration job is already fetching them. Each prefetch
+    # persists its own result, so none is wasted if the request returns early
+    # or ends up joining another request's hydration job.
+    # Stored ids are read once here, not per month on the calendar workers.
+    stored = stored_training_ids(user_id)
+    prefetched = {}
+
+    def _prefetch_month(days):
+        for w in _extract_completed(days):
+            if w["tid"] not in stored:
+                prefetched[w["tid"]] = EXECUTOR.submit(_fetch_and_store_detail, w, headers, user_id)
+
+    on_month = None if _hydration_running(user_id) else _prefetch_month
+    all_days, failed, err = fetch_calendar_months(13, headers, on_month=on_month)
+    if err:
+        return None, None, None, None, err
+    return _extract_completed(all_days), failed, stored, prefetched, None
+
+
+def _build_history(user_id, headers, completed, stored, prefetched, read):
+    """Hydrate missing details, merge them into the user's aggregate and read it.
+
+    Returns (read(state), hydrating, complete): `hydrating` if details were still
+    being fetched after HYDRATE_WAIT, `complete` if every completed workout is in.
+    """
+    # Ids only: blobs are loaded later, and only for workouts the aggregate hasn't merged
+    missing = [w for w in completed if w["tid"] not in stored]
+
+    hydrating = False
+    fetched = {}
+    if missing:
+        future = _start_hydration(missing, headers, user_id, prefetched)
+        try:
+            fetched = future.result(timeout=HYDRATE_WAIT)
+        except TimeoutError:
+            # Serve what is stored so far; the client polls until hydration finishes
+            hydrating = True
+
+    view = _aggregate(completed, user_id, fetched, read)
+    return view, hydrating, all(w["tid"] in fetched for w in missing)
+
+
+def _recent_tids(completed):
+    """trainingIds of the completed workouts dated in the two most recent calendar months."""
+    months = calendar_months(2)
+    return frozenset(w["tid"] for w in completed if w["date"][:7] in months)
 
 
 @workouts_bp.route("/api/exercise-history")
@@ -201,233 +423,311 @@ def get_exercise_history():
     if not session.get("token"):
         return jsonify({"ok": False, "error": "Not logged in"}), 401
 
-    token = session["token"]
     user_id = session["user_id"]
-
-    with cache_lock:
-        if (
-            exercise_history_cache["data"] is not None
-            and exercise_history_cache["user_id"] == user_id
-            and time.time() - exercise_history_cache["timestamp"] < CACHE_TTL
-        ):
-            return jsonify({
-                "ok": True,
-                "exercises": exercise_history_cache["data"],
-                "daily_volume": exercise_history_cache.get("daily_volume", []),
-                "exercise_daily": exercise_history_cache.get("exercise_daily", {}),
-                "exercise_last_time": exercise_history_cache.get("exercise_last_time", {}),
-            })
-
+    # One headers dict for the whole request, shared by every worker it starts
     headers = auth_headers()
-    all_days, err = fetch_calendar_months(13, headers)
+    cutoff_date = _cutoff_14d()
+
+    # Serve the snapshot while the recent months hold exactly the trainings it was
+    # built from: a new one or a deleted one forces a rebuild. Only the recent
+    # months are checked; a same-day cutoff also means the same two months.
+    payload, cached_user, cached_fingerprint = get_history_snapshot()
+    if payload is not None and cached_user == user_id and cached_fingerprint is not None:
+        _, known_recent, built_cutoff = cached_fingerprint
+        if built_cutoff == cutoff_date:
+            recent_days, _, err = fetch_calendar_months(2, headers)
+            if err:
+                return err
+            if _recent_tids(_extract_completed(recent_days)) == known_recent:
+                return jsonify({"ok": True, **payload})
+
+    completed, failed, stored, prefetched, err = _fetch_completed(user_id, headers)
     if err:
         return err
 
-    completed = _extract_completed(all_days)
+    # Same completed workouts (and same cutoff) as the last build: nothing to redo.
+    # A month that failed to load leaves workouts out, so that build gets no
+    # fingerprint and is never served from the fast path.
+    fingerprint = None
+    if not failed:
+        fingerprint = (frozenset(w["tid"] for w in completed), _recent_tids(completed), cutoff_date)
+    if (fingerprint is not None and payload is not None and cached_user == user_id
+            and cached_fingerprint == fingerprint):
+        return jsonify({"ok": True, **payload})
+
+    (result, daily_volume, exercise_daily, exercise_last_time), hydrating, complete = _build_history(
+        user_id, headers, completed, stored, prefetched,
+        lambda state: _emit_aggregate(state, cutoff_date))
+    if hydrating:
+        return jsonify({
+            "ok": True,
+            "hydrating": True,
+            "exercises": result,
+            "daily_volume": daily_volume,
+            "exercise_daily": exercise_daily,
+            "exercise_last_time": exercise_last_time,
+        })
+    # A detail fetch that failed will be retried, so don't pin this build to the fingerprint
+    if not complete:
+        fingerprint = None
 
-    history_cache = load_history_cache()
-    if history_cache.get("user_id") != user_id or history_cache.get("version") != CACHE_VERSION:
-        history_cache = {"user_id": user_id, "trainings": {}, "version": CACHE_VERSION}
+    payload = {
+        "exercises": result,
+        "daily_volume": daily_volume,
+        "exercise_daily": exercise_daily,
+        "exercise_last_time": exercise_last_time,
+    }
+    set_history_snapshot(payload, user_id, fingerprint)
 
-    history_cache = _fetch_uncached_details(completed, history_cache, token, user_id)
+    return jsonify({"ok": True, **payload})
 
-    today = datetime.now()
-    cutoff_date = (today - timedelta(days=14)).strftime("%Y-%m-%d")
-    result = _build_exercise_results(completed, history_cache, cutoff_date)
-    daily_volume, exercise_daily, exercise_last_time = _build_daily_volumes(completed, history_cache)
 
-    with cache_lock:
-        exercise_history_cache["data"] = result
-        exercise_history_cache["daily_volume"] = daily_volume
-        exercise_history_cache["exercise_daily"] = exercise_daily
-        exercise_history_cache["exercise_last_time"] = exercise_last_time
-        exercise_history_cache["timestamp"] = time.time()
-        exercise_history_cache["user_id"] = user_id
+def _csv(raw):
+    """Split a comma-separated template field (string or bare number) into strings; [] if empty."""
+    return str(raw).split(",") if raw else []
 
-    return jsonify({"ok": True, "exercises": result, "daily_volume": daily_volume, "exercise_daily": exercise_daily, "exercise_last_time": exercise_last_time})
 
+def _exercise_sessions(state, name):
+    """Every session of one exercise from an aggregate state (call with the lock held).
 
-@workouts_bp.route("/api/templates")
-def get_templates():
-    """Fetch all custom training templates with exercise names."""
+    Returns None if the exercise isn't in it.
+    """
+    data = state["exercise_map"].get(name)
+    if data is None:
+        return None
+    sessions = data["sessions"]
+    if not data["sorted"]:
+        sessions.sort(key=itemgetter(0))
+        data["sorted"] = True
+    dates, volumes, max_weights = zip(*sessions)
+    return {
+        "dates": list(dates),
+        "volumes": [round(v, 1) for v in volumes],
+        "max_weights": [round(m, 1) for m in max_weights],
+    }
+
+
+@workouts_bp.route("/api/exercise-history/full")
+def get_exercise_history_full():
+    """Every session of one exercise (?name=), for the exercise detail chart."""
     if not session.get("token"):
         return jsonify({"ok": False, "error": "Not logged in"}), 401
 
-    headers = auth_headers()
+    name = request.args.get("name", "")
+    user_id = session["user_id"]
+    with _aggregate_lock:
+        state = _aggregate_states.get(user_id)
+        history = _exercise_sessions(state, name) if state is not None else False
+    if history is False:
+        # Nothing aggregated for this user yet: build it, reading the exercise under the same lock
+        headers = auth_headers()
+        completed, _, stored, prefetched, err = _fetch_completed(user_id, headers)
+        if err:
+            return err
+        history, _, _ = _build_history(
+            user_id, headers, completed, stored, prefetched,
+            lambda state: _exercise_sessions(state, name))
+    if not history:
+        return jsonify({"ok": False, "error": "Unknown exercise"}), 404
+    return jsonify({"ok": True, "name": name, "history": history})
+
+
+def _planned_volume(ex):
+    """Sum reps × per-handle weight over an exercise's sets, skipping RM/counterweight sets."""
+    reps_list = _csv(ex.get("setsAndReps"))
+    n = len(reps_list)
+    weights_list = _csv(ex.get("weights"))[:n]
+    counters_list = _csv(ex.get("counterweight2") or ex.get("counterweight"))[:n]
+    total = 0
+    for rep_s, weight_s, counter in zip_longest(reps_list, weights_list, counters_list, fillvalue=""):
+        if not rep_s:
+            continue
+        counter = counter.strip()
+        if counter and counter != "0":
+            continue
+        try:
+            total += float(rep_s) * (float(weight_s) if weight_s else 0)
+        except ValueError:
+            pass
+    return total
+
 
+def _list_templates(headers):
+    """Fetch the raw custom template list. Returns (templates_raw, error_response).
+
+    A failed upstream reply is an error, never an empty list, so it can't be
+    cached as "no templates".
+    """
     try:
-        resp = http_requests.get(
+        body = cached_get(
             f"{BASE_URL}/api/app/v4/customTrainingTemplate/appPage",
-            params={"pageNo": 1, "pageSize": -1, "deviceTypes": DEVICE_TYPE},
-            headers=headers,
+            {"pageNo": 1, "pageSize": -1, "deviceTypes": DEVICE_TYPE},
+            headers,
             timeout=15,
         )
-        body = resp.json()
-        expired = check_session_expired(body)
-        if expired:
-            return expired
-        templates_raw = body.get("data") or []
-    except http_requests.RequestException as e:
-        return jsonify({"ok": False, "error": f"Failed to list templates: {e}"}), 500
+    except (http_requests.RequestException, ValueError) as e:
+        return None, (jsonify({"ok": False, "error": f"Failed to list templates: {e}"}), 500)
+    if body is None:
+        return None, (jsonify({"ok": False, "error": "Failed to list templates: upstream error"}), 502)
+    expired = check_session_expired(body)
+    if expired:
+        return None, expired
+    return body.get("data") or [], None
 
-    # Load handle types for accurate volume calculation
-    handle_types = load_handle_types()
+
+@workouts_bp.route("/api/templates")
+def get_templates():
+    """Fetch all custom training templates with exercise names."""
+    if not session.get("token"):
+        return jsonify({"ok": False, "error": "Not logged in"}), 401
+
+    user_id = session["user_id"]
+    templates = get_templates_cache("list", user_id)
+    if templates is not None:
+        return jsonify({"ok": True, "templates": templates})
+
+    headers = auth_headers()
+
+    templates_raw, err = _list_templates(headers)
+    if err:
+        return err
+
+    # Load handle types for accurate volume calculation; everything not listed
+    # as single-weight is a dual-handle exercise (total weight = 2 × per handle)
+    single_weight = {name for name, kind in load_handle_types().items() if kind != "Dual Handle"}
 
     # Fetch detail for each template in parallel to get exercise names + planned volume
     def _fetch_template_detail(code):
         try:
-            r = http_requests.get(
+            r = SESSION.get(
                 f"{BASE_URL}/api/app/v3/customTrainingTemplate/detailByCode",
                 params={"code": code},
                 headers=headers,
                 timeout=10,
             )
-            d = r.json().get("data")
+            _, d = response_data(r)
             if d:
                 exercises = d.get("actionLibraryList") or []
                 names = [ex.get("title", "Unknown") for ex in exercises]
                 # Compute planned volume: sum(reps × total_weight) per set
                 planned_vol = 0
                 for ex in exercises:
-                    reps_csv = str(ex.get("setsAndReps") or "")
-                    weights_csv = str(ex.get("weights") or "")
-                    counters_csv = str(ex.get("counterweight2") or ex.get("counterweight") or "")
-                    reps_list = reps_csv.split(",")
-                    weights_list = weights_csv.split(",")
-                    counters_list = counters_csv.split(",")
-                    for i in range(len(reps_list)):
-                        if not reps_list[i]:
-                            continue
-                        counter = counters_list[i].strip() if i < len(counters_list) else ""
-                        if counter and counter != "0":
-                            continue  # Skip RM/counterweight exercises
-                        try:
-                            rep_val = float(reps_list[i])
-                            wt = float(weights_list[i]) if i < len(weights_list) and weights_list[i] else 0
-                            ex_name = ex.get("title", "")
-                            is_dual = handle_types.get(ex_name, "Dual Handle") == "Dual Handle"
-                            total_wt = wt * 2 if is_dual else wt
-                            planned_vol += rep_val * total_wt
-                        except (ValueError, IndexError):
-                            pass
+                    dual_factor = 1.0 if ex.get("title", "") in single_weight else 2.0
+                    planned_vol += _planned_volume(ex) * dual_factor
                 return {"names": names, "plannedVolume": round(planned_vol, 1)}
         except Exception:
             pass
         return None
 
-    code_map = {}
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_code = {
-            executor.submit(_fetch_template_detail, t["code"]): t["code"]
-            for t in templates_raw if t.get("code")
-        }
-        for future in as_completed(future_to_code):
-            code = future_to_code[future]
-            result = future.result()
-            if result is not None:
-                code_map[code] = result
-
-    templates = []
-    for t in templates_raw:
-        code = t.get("code", "")
-        detail = code_map.get(code, {})
-        templates.append({
-            "name": t.get("name", "Untitled"),
-            "code": code,
-            "actionNum": t.get("actionNum", 0),
-            "exercises": detail.get("names", []) if isinstance(detail, dict) else detail,
-            "plannedVolume": detail.get("plannedVolume", 0) if isinstance(detail, dict) else 0,
-        })
-
+    # Build the response up front and fill in details as each fetch completes
+    templates = [{
+        "name": t.get("name", "Untitled"),
+        "code": t.get("code", ""),
+        "actionNum": t.get("actionNum", 0),
+        "exercises": [],
+        "plannedVolume": 0,
+    } for t in templates_raw]
+    future_to_template = {
+        EXECUTOR.submit(_fetch_template_detail, entry["code"]): entry
+        for entry in templates if entry["code"]
+    }
+    complete = True
+    for future in as_completed(future_to_template):
+        detail = future.result()
+        if detail is not None:
+            entry = future_to_template[future]
+            entry["exercises"] = detail["names"]
+            entry["plannedVolume"] = detail["plannedVolume"]
+        else:
+            complete = False
+
+    # Don't keep a list with missing details around; the next call retries them
+    if complete:
+        set_templates_cache("list", user_id, templates)
     return jsonify({"ok": True, "templates": templates})
 
 
+_MODE_LUT = {"1": "Standard", "2": "Eccentric", "3": "Eccentric", "4": "Chain"}  # sportMode code → name
+
+
 @workouts_bp.route("/api/templates/export")
 def export_templates():
     """Export all custom training templates with full exercise details for LLM analysis."""
     if not session.get("token"):
         return jsonify({"ok": False, "error": "Not logged in"}), 401
 
+    user_id = session["user_id"]
+    templates = get_templates_cache("export", user_id)
+    if templates is not None:
+        return jsonify({"ok": True, "templates": templates})
+
     headers = auth_headers()
 
-    try:
-        resp = http_requests.get(
-            f"{BASE_URL}/api/app/v4/customTrainingTemplate/appPage",
-            params={"pageNo": 1, "pageSize": -1, "deviceTypes": DEVICE_TYPE},
-            headers=headers,
-            timeout=15,
-        )
-        body = resp.json()
-        expired = check_session_expired(body)
-        if expired:
-            return expired
-        templates_raw = body.get("data") or []
-    except http_requests.RequestException as e:
-        return jsonify({"ok": False, "error": f"Failed to list templates: {e}"}), 500
+    templates_raw, err = _list_templates(headers)
+    if err:
+        return err
 
     def _fetch_full_detail(code):
         try:
-            r = http_requests.get(
+            r = SESSION.get(
                 f"{BASE_URL}/api/app/v3/customTrainingTemplate/detailByCode",
                 params={"code": code},
                 headers=headers,
                 timeout=10,
             )
-            d = r.json().get("data")
+            _, d = response_data(r)
             if d:
                 return d.get("actionLibraryList") or []
         except Exception:
             pass
         return None
 
-    modeNames = {'1': 'Standard', '2': 'Eccentric', '3': 'Eccentric', '4': 'Chain'}
-
-    detail_map = {}
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_code = {
-            executor.submit(_fetch_full_detail, t["code"]): t["code"]
-            for t in templates_raw if t.get("code")
-        }
-        for future in as_completed(future_to_code):
-            code = future_to_code[future]
-            result = future.result()
-            if result is not None:
-                detail_map[code] = result
-
-    templates = []
-    for t in templates_raw:
-        code = t.get("code", "")
-        raw_exercises = detail_map.get(code, [])
-        exercises = []
+    mode_get = _MODE_LUT.get
+
+    # Build the response up front and parse each template as its fetch completes
+    templates = [{"name": t.get("name", "Untitled"), "exercises": []} for t in templates_raw]
+    future_to_template = {
+        EXECUTOR.submit(_fetch_full_detail, t["code"]): entry
+        for t, entry in zip(templates_raw, templates) if t.get("code")
+    }
+    complete = True
+    for future in as_completed(future_to_template):
+        raw_exercises = future.result()
+        if raw_exercises is None:
+            complete = False
+        if not raw_exercises:
+            continue
+        exercises = future_to_template[future]["exercises"]
         for ex in raw_exercises:
             name = ex.get("title") or ex.get("name") or "Unknown"
-            reps_list = str(ex.get("setsAndReps") or "").split(",")
-            weights_list = str(ex.get("weights") or "").split(",")
-            modes_list = str(ex.get("sportMode") or "").split(",")
-            rest_list = str(ex.get("breakTime2") or ex.get("breakTime") or "").split(",")
-            counters_list = str(ex.get("counterweight2") or ex.get("counterweight") or "").split(",")
-            count_types = str(ex.get("countType") or "").split(",")
-            left_right = str(ex.get("leftRight") or "").split(",")
+            cols = [_csv(v) for v in (
+                ex.get("setsAndReps"),
+                ex.get("weights"),
+                ex.get("sportMode"),
+                ex.get("breakTime2") or ex.get("breakTime"),
+                ex.get("counterweight2") or ex.get("counterweight"),
+                ex.get("countType"),
+                ex.get("leftRight"),
+            )]
+            # Walk all columns together, bounded by the reps column, with "" for missing values
+            n = len(cols[0])
+            rows = zip_longest(*(c[:n] for c in cols), fillvalue="")
 
             sets = []
-            for i in range(len(reps_list)):
-                if not reps_list[i]:
+            append = sets.append
+            for i, (rep_val, weight_s, mode_code, rest_s, counter, count_type, side_code) in enumerate(rows, 1):
+                if not rep_val:
                     continue
-                is_time = count_types[i] == '2' if i < len(count_types) else False
-                rep_val = reps_list[i]
-                weight_kg = float(weights_list[i]) if i < len(weights_list) and weights_list[i] else 0
-                counter = counters_list[i] if i < len(counters_list) else ""
-                mode_code = modes_list[i] if i < len(modes_list) else ""
-                rest_s = rest_list[i] if i < len(rest_list) else ""
-                side_code = left_right[i] if i < len(left_right) else ""
+                is_time = count_type == '2'
+                weight_kg = float(weight_s) if weight_s else 0
 
                 s = {
-                    "set": i + 1,
+                    "set": i,
                     "reps": f"{rep_val}s" if is_time else int(rep_val) if rep_val.isdigit() else rep_val,
                     "weight_per_handle_kg": weight_kg,
                     "total_weight_kg": weight_kg * 2 if weight_kg else 0,
-                    "mode": modeNames.get(mode_code, mode_code or "Standard"),
-                    "rest_seconds": int(rest_s) if rest_s and rest_s.isdigit() else 0,
+                    "mode": mode_get(mode_code) or mode_code or "Standard",
+                    "rest_seconds": int(rest_s) if rest_s.isdigit() else 0,
                 }
                 if counter and counter != "0":
                     s["counterweight_rm"] = counter
@@ -435,11 +735,12 @@ def export_templates():
                     s["side"] = "Left"
                 elif side_code == "2":
                     s["side"] = "Right"
-                sets.append(s)
+                append(s)
 
             exercises.append({"name": name, "sets": sets})
-        templates.append({"name": t.get("name", "Untitled"), "exercises": exercises})
 
+    if complete:
+        set_templates_cache("export", user_id, templates)
     return jsonify({"ok": True, "templates": templates})
 
 
@@ -451,19 +752,18 @@ def get_workout_detail(template_code):
     headers = auth_headers()
 
     try:
-        resp = http_requests.get(
+        resp = SESSION.get(
             f"{BASE_URL}/api/app/v3/customTrainingTemplate/detailByCode",
             params={"code": template_code},
             headers=headers,
         )
-        body = resp.json()
+        body, data = response_data(resp)
         expired = check_session_expired(body)
         if expired:
             return expired
-        data = body.get("data")
         if data:
             return jsonify({"ok": True, "detail": data})
-    except http_requests.RequestException as e:
+    except (http_requests.RequestException, ValueError) as e:
         print(f"Custom template error: {e}")
 
     return jsonify({
@@ -518,20 +818,23 @@ def save_workout_template():
 
     headers = auth_headers()
     try:
-        resp = http_requests.post(
+        resp = SESSION.post(
             f"{BASE_URL}/api/app/v2/customTrainingTemplate",
             headers=headers,
             json=data,
             timeout=15,
         )
-        body = resp.json()
+        # The cached template list (and responses built from it) may no longer match upstream
+        invalidate_cached_get(session["user_id"])
+        invalidate_templates_cache()
+        body = response_json(resp)
         expired = check_session_expired(body)
         if expired:
             return expired
         if body.get("code") == 0:
             return jsonify({"ok": True})
         return jsonify({"ok": False, "error": body.get("msg", "Save failed")}), 500
-    except http_requests.RequestException as e:
+    except (http_requests.RequestException, ValueError) as e:
         return jsonify({"ok": False, "error": f"Save failed: {e}"}), 500
 
 
@@ -551,15 +854,14 @@ def get_training_detail(training_id):
 
     for url in endpoints:
         try:
-            resp = http_requests.get(url, headers=headers, timeout=10)
-            body = resp.json()
+            resp = SESSION.get(url, headers=headers, timeout=10)
+            body, data = response_data(resp)
             expired = check_session_expired(body)
             if expired:
                 return expired
-            data = body.get("data")
             if data:
                 return jsonify({"ok": True, "training": data, "source": url})
-        except http_requests.RequestException:
+        except (http_requests.RequestException, ValueError):
             continue
 
     return jsonify({"ok": False, "error": "Could not load training data"}), 404
@@ -572,12 +874,19 @@ def debug_calendar():
         return jsonify({"ok": False, "error": "Not logged in"}), 401
     headers = auth_headers()
     month_str = datetime.now().strftime("%Y-%m")
-    resp = http_requests.get(
+    resp = SESSION.get(
         f"{BASE_URL}/api/app/v5/trainingCalendar/monthNew",
         params={"date": month_str, "selectedDeviceType": DEVICE_TYPE},
         headers=headers,
+        timeout=15,
+    )
+    # Relay the upstream bytes as-is rather than decoding and re-encoding them,
+    # labelled with the upstream type so error pages aren't passed off as JSON
+    return Response(
+        resp.content,
+        status=resp.status_code,
+        content_type=resp.headers.get("Content-Type", "application/json"),
     )
-    return jsonify(resp.json())
 
 
 @workouts_bp.route("/api/debug/training/<int:training_id>")
@@ -587,7 +896,6 @@ def debug_training(training_id):
         return jsonify({"ok": False, "error": "Not logged in"}), 401
 
     headers = auth_headers()
-    results = {}
 
     candidates = [
         f"{BASE_URL}/api/app/customTraining/detail?id={training_id}",
@@ -604,18 +912,33 @@ def debug_training(training_id):
         f"{BASE_URL}/api/app/workoutRecord/detail?id={training_id}",
     ]
 
-    for url in candidates:
+    def _probe(url):
         try:
-            resp = http_requests.get(url, headers=headers, timeout=5)
-            body = resp.json()
-            has_data = body.get("data") is not None and body.get("data") != {}
-            results[url] = {
+            resp = SESSION.get(url, headers=headers, timeout=5)
+            body, data = response_data(resp)
+            has_data = data is not None and data != {}
+            return url, {
                 "status": resp.status_code,
                 "code": body.get("code"),
                 "has_data": has_data,
                 "preview": str(body)[:300],
             }
         except Exception as e:
-            results[url] = {"error": str(e)}
-
-    return jsonify({"ok": True, "results": results})
+            return url, {"error": str(e)}
+
+    # Probe concurrently and stop at the first endpoint that returns data;
+    # probes never reached are cancelled and left out of the results
+    futures = [EXECUTOR.submit(_probe, url) for url in candidates]
+    found = None
+    collected = {}
+    for future in as_completed(futures):
+        url, result = future.result()
+        collected[url] = result
+        if result.get("has_data"):
+            found = url
+            for f in futures:
+                f.cancel()
+            break
+
+    results = {url: collected[url] for url in candidates if url in collected}
+    return jsonify({"ok": True, "found": found, "results": results})
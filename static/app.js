@@ -23,6 +23,15 @@ function esc(str) {
 
 function str(v) { return v == null ? '' : String(v); }
 
+// Exercise history arrives as parallel arrays ({dates, volumes, max_weights});
+// expand to the {date, volume, max_weight} rows the renderers use.
+function historyRows(cols) {
+    if (!cols || !cols.dates) return [];
+    const volumes = cols.volumes || [];
+    const maxWeights = cols.max_weights || [];
+    return cols.dates.map((date, i) => ({date, volume: volumes[i] || 0, max_weight: maxWeights[i] || 0}));
+}
+
 async function apiFetch(url, options) {
     const resp = await fetch(url, options);
     if (resp.status === 401) {
@@ -167,6 +176,7 @@ async function doLogout() {
     window._workouts = null;
     window._exerciseHistory = null;
     window._exerciseDaily = null;
+    clearTimeout(historyPollTimer);
     document.getElementById('exerciseHistorySection').style.display = 'none';
     document.getElementById('muscleMapContainer').style.display = 'none';
 }
@@ -489,12 +499,18 @@ function renderExerciseHistoryTable() {
     });
 }
 
-async function loadExerciseHistory() {
+const HISTORY_POLL_MS = 3000;
+let historyPollTimer = null;
+
+async function loadExerciseHistory(isPoll) {
     const section = document.getElementById('exerciseHistorySection');
     const content = document.getElementById('exerciseHistoryContent');
-    section.style.display = 'block';
-    content.innerHTML = '<div class="spinner">Loading exercise history...</div>';
-    loadMuscleMap();
+    clearTimeout(historyPollTimer);
+    if (!isPoll) {
+        section.style.display = 'block';
+        content.innerHTML = '<div class="spinner">Loading exercise history...</div>';
+        loadMuscleMap();
+    }
 
     try {
         const data = await apiFetch('/api/exercise-history');
@@ -505,17 +521,27 @@ async function loadExerciseHistory() {
             return;
         }
 
+        // Server is still fetching older workouts: show what it has and poll for the rest
+        if (data.hydrating) {
+            historyPollTimer = setTimeout(() => loadExerciseHistory(true), HISTORY_POLL_MS);
+        }
+
         if (!data.exercises || data.exercises.length === 0) {
-            content.innerHTML = '<div class="empty">No completed workout data yet</div>';
+            content.innerHTML = data.hydrating
+                ? '<div class="spinner">Loading exercise history...</div>'
+                : '<div class="empty">No completed workout data yet</div>';
             return;
         }
 
+        data.exercises.forEach(ex => { ex.history = historyRows(ex.history); });
+        const dailyVolume = historyRows(data.daily_volume);
+
         window._exerciseHistory = data.exercises;
         window._exerciseDaily = data.exercise_daily || {};
         window._exerciseLastTime = data.exercise_last_time || {};
         renderExerciseHistoryTable();
-        renderActivityHeatmap(data.daily_volume || []);
-        renderDailyVolumeChart(data.daily_volume || []);
+        renderActivityHeatmap(dailyVolume);
+        renderDailyVolumeChart(dailyVolume);
         renderMuscleGroupCharts();
         updateMuscleMapColors();
     } catch (e) {
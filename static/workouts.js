@@ -615,16 +615,35 @@ function buildMuscleVolumeSummary(exercises) {
     `;
 }
 
-function openExerciseDetail(exerciseName) {
+async function openExerciseDetail(exerciseName) {
     if (!window._exerciseHistory) return;
     const ex = window._exerciseHistory.find(e => e.name === exerciseName);
     if (!ex) return;
 
     workoutView.style.display = 'none';
     detailView.style.display = 'block';
+
+    // Show the recent sessions straight away, then every session once fetched
+    renderExerciseDetail(ex, ex.all_history || ex.history);
+    if (ex.all_history) return;
     const content = document.getElementById('detailContent');
+    const shown = content.firstElementChild;
+    try {
+        const data = await apiFetch('/api/exercise-history/full?name=' + encodeURIComponent(exerciseName));
+        if (!data || !data.ok) return;
+        ex.all_history = historyRows(data.history);
+        // Only redraw if the user is still looking at this exercise
+        if (detailView.style.display === 'block' && content.firstElementChild === shown) {
+            renderExerciseDetail(ex, ex.all_history);
+        }
+    } catch (e) {
+        // Keep showing the recent sessions
+    }
+}
 
-    const sessions = ex.all_history || ex.history;
+function renderExerciseDetail(ex, sessions) {
+    const exerciseName = ex.name;
+    const content = document.getElementById('detailContent');
     const maxWeight = ex.max_weight || 0;
 
     // Bar chart